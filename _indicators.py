@@ -0,0 +1,205 @@
+import numpy as np
+import pandas as pd
+
+try:
+    from numba import njit
+except ImportError:  # compute_indicators falls back to the NumPy implementation below
+    njit = None
+
+# JIT-compile the kernels when numba is installed, otherwise leave them as plain Python
+_jit = njit(cache=True) if njit is not None else (lambda func: func)
+
+# Compute a simple moving average with a sliding window sum
+@_jit
+def _rolling_mean(close, window):
+    """
+    Compute the simple moving average of a price series with a sliding window sum.
+    :param close: float64 array of closing prices
+    :param window: Number of bars in the window
+    :return: float64 array, NaN until the window is full or while it holds a NaN
+    """
+    n = close.shape[0]
+    out = np.full(n, np.nan)
+    total = 0.0
+    nans = 0
+    for i in range(n):
+        if np.isnan(close[i]):
+            nans += 1
+        else:
+            total += close[i]
+        if i >= window:
+            if np.isnan(close[i - window]):
+                nans -= 1
+            else:
+                total -= close[i - window]
+        if i >= window - 1 and nans == 0:
+            out[i] = total / window
+    return out
+
+# Compute a rolling sample standard deviation around a precomputed rolling mean
+@_jit
+def _rolling_std(close, mean, window):
+    """
+    Compute the rolling sample standard deviation (ddof=1) of a price series.
+    :param close: float64 array of closing prices
+    :param mean: Rolling mean of close over the same window
+    :param window: Number of bars in the window
+    :return: float64 array, NaN wherever the rolling mean is NaN
+    """
+    n = close.shape[0]
+    out = np.full(n, np.nan)
+    for i in range(window - 1, n):
+        if np.isnan(mean[i]):
+            continue
+        acc = 0.0
+        for j in range(i - window + 1, i + 1):
+            d = close[j] - mean[i]
+            acc += d * d
+        out[i] = np.sqrt(acc / (window - 1))
+    return out
+
+# Compute the RSI with Wilder's smoothing
+@_jit
+def _wilder_rsi(close, period):
+    """
+    Compute the Relative Strength Index using Wilder's smoothing (alpha = 1/period).
+    :param close: float64 array of closing prices
+    :param period: RSI look-back period
+    :return: float64 array of RSI values in [0, 100]
+    """
+    n = close.shape[0]
+    out = np.full(n, np.nan)
+    alpha = 1.0 / period
+    avg_gain = np.nan
+    avg_loss = np.nan
+    for i in range(1, n):
+        delta = close[i] - close[i - 1]
+        if not np.isnan(delta):
+            gain = delta if delta > 0 else 0.0
+            loss = -delta if delta < 0 else 0.0
+            if np.isnan(avg_gain):
+                avg_gain = gain
+                avg_loss = loss
+            else:
+                avg_gain += alpha * (gain - avg_gain)
+                avg_loss += alpha * (loss - avg_loss)
+        if np.isnan(avg_gain):
+            continue
+        if avg_loss == 0.0:
+            out[i] = 100.0 if avg_gain > 0.0 else np.nan
+        else:
+            out[i] = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    return out
+
+# Compute every technical indicator shown by the app in one JIT-compiled call
+@_jit
+def _compute_indicators_jit(close):
+    """
+    Compute the technical indicators for a series of closing prices with the numba kernels.
+    :param close: float64 array of closing prices
+    :return: Tuple of float64 arrays (MA50, MA200, RSI, Upper_BB, Lower_BB)
+    """
+    ma50 = _rolling_mean(close, 50)
+    ma200 = _rolling_mean(close, 200)
+    rsi = _wilder_rsi(close, 14)
+    ma20 = _rolling_mean(close, 20)
+    std20 = _rolling_std(close, ma20, 20)
+    return ma50, ma200, rsi, ma20 + 2.0 * std20, ma20 - 2.0 * std20
+
+# Compute rolling window sums in O(N) from a cumulative sum
+def _rolling_sum_numpy(values, window):
+    """
+    Compute the sum of every full sliding window as a difference of cumulative sums.
+    :param values: float64 array
+    :param window: Number of bars in the window
+    :return: float64 array, NaN until the window is full or while it holds a NaN
+    """
+    n = values.shape[0]
+    out = np.full(n, np.nan)
+    if n < window:
+        return out
+    nan_mask = np.isnan(values)
+    csum = np.concatenate(([0.0], np.cumsum(np.where(nan_mask, 0.0, values))))
+    cnan = np.concatenate(([0], np.cumsum(nan_mask)))
+    sums = csum[window:] - csum[:-window]
+    out[window - 1:] = np.where(cnan[window:] == cnan[:-window], sums, np.nan)
+    return out
+
+# Compute a rolling sample standard deviation in O(N) from sums of x and x squared
+def _rolling_std_numpy(close, window):
+    """
+    Compute the rolling sample standard deviation (ddof=1) of a price series.
+    Prices are centred first so the sums of squares don't lose precision to cancellation.
+    :param close: float64 array of closing prices
+    :param window: Number of bars in the window
+    :return: float64 array, NaN until the window is full or while it holds a NaN
+    """
+    centred = close - np.nanmean(close) if close.shape[0] else close
+    s1 = _rolling_sum_numpy(centred, window)
+    s2 = _rolling_sum_numpy(centred * centred, window)
+    return np.sqrt(np.maximum(s2 - s1 * s1 / window, 0.0) / (window - 1))
+
+# Compute the RSI with Wilder's smoothing, leaving the recurrence to pandas' ewm
+def _wilder_rsi_numpy(close, period):
+    """
+    Compute the Relative Strength Index using Wilder's smoothing (alpha = 1/period).
+    :param close: float64 array of closing prices
+    :param period: RSI look-back period
+    :return: float64 array of RSI values in [0, 100]
+    """
+    delta = np.full(close.shape[0], np.nan)
+    if close.shape[0] > 1:
+        np.subtract(close[1:], close[:-1], out=delta[1:])
+    # np.maximum keeps NaN, so gaps are skipped by ewm the same way the numba kernel skips them
+    avg_gain = pd.Series(np.maximum(delta, 0.0)).ewm(alpha=1.0 / period, adjust=False, ignore_na=True).mean()
+    avg_loss = pd.Series(np.maximum(-delta, 0.0)).ewm(alpha=1.0 / period, adjust=False, ignore_na=True).mean()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return 100.0 - 100.0 / (1.0 + avg_gain.to_numpy() / avg_loss.to_numpy())
+
+# Compute every technical indicator shown by the app with vectorized NumPy
+def _compute_indicators_numpy(close):
+    """
+    Compute the technical indicators for a series of closing prices without numba.
+    :param close: float64 array of closing prices
+    :return: Tuple of float64 arrays (MA50, MA200, RSI, Upper_BB, Lower_BB)
+    """
+    close = np.ascontiguousarray(close, dtype=np.float64)
+    ma50 = _rolling_sum_numpy(close, 50) / 50
+    ma200 = _rolling_sum_numpy(close, 200) / 200
+    rsi = _wilder_rsi_numpy(close, 14)
+    ma20 = _rolling_sum_numpy(close, 20) / 20
+    std20 = _rolling_std_numpy(close, 20)
+    return ma50, ma200, rsi, ma20 + 2.0 * std20, ma20 - 2.0 * std20
+
+# Public entry point: the numba kernel when available, the NumPy version otherwise
+compute_indicators = _compute_indicators_jit if njit is not None else _compute_indicators_numpy
+
+# Pick the points to plot with Largest-Triangle-Three-Buckets downsampling
+def lttb_indices(y, n_out=500):
+    """
+    Select the indices of n_out points that preserve the visual shape of a series, using the
+    Largest-Triangle-Three-Buckets algorithm with the bar position as the x coordinate.
+    :param y: Array of values to downsample
+    :param n_out: Number of points to keep, including the first and last
+    :return: Sorted int64 array of selected indices
+    """
+    y = np.asarray(y, dtype=np.float64)
+    n = y.shape[0]
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.arange(n, dtype=np.float64)
+    # n_out - 2 buckets over the interior points; the first and last points are always kept
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    out = np.empty(n_out, dtype=np.int64)
+    out[0] = 0
+    out[-1] = n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start, next_end = (edges[i + 1], edges[i + 2]) if i + 2 < edges.shape[0] else (n - 1, n)
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(np.nan_to_num(area, nan=-1.0)))
+        out[i + 1] = a
+    return out
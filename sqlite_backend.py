@@ -1,8 +1,152 @@
 import sqlite3
-import os
+import pathlib
+import hashlib
+import logging
+import threading
+import zlib
 
-# Define the path for the SQLite database
-DB_PATH = os.path.join(os.getcwd(), "investment_analysis.db")
+logger = logging.getLogger(__name__)
+
+# Define the path for the SQLite database, next to this module regardless of the working directory
+DB_PATH = str(pathlib.Path(__file__).with_name("investment_analysis.db"))
+
+# Shared connection reused by every function in this module, guarded by a lock
+# because Streamlit may run overlapping reruns on different threads
+_conn = None
+_lock = threading.RLock()
+
+# Schema of the 'analysis_data' table. id is a plain INTEGER PRIMARY KEY (a rowid alias)
+# rather than AUTOINCREMENT, which would update sqlite_sequence on every insert.
+# Lookups use the fixed-size params_hash; parameters is kept readable for display
+_CREATE_TABLE = '''
+    CREATE TABLE IF NOT EXISTS analysis_data (
+        id INTEGER PRIMARY KEY,
+        topic TEXT NOT NULL,
+        parameters TEXT NOT NULL,
+        params_hash BLOB NOT NULL,
+        content BLOB NOT NULL
+    )
+'''
+
+# Static SQL for the CRUD hot paths, kept in one place. The sqlite3 driver already caches
+# prepared statements by their SQL text, so every call reuses the same compiled statement
+_STMTS = {
+    "insert": "INSERT INTO analysis_data (topic, parameters, params_hash, content) VALUES (?, ?, ?, ?)",
+    "select": "SELECT content FROM analysis_data WHERE topic = ? AND params_hash = ?",
+    "delete": "DELETE FROM analysis_data WHERE topic = ? AND params_hash = ?",
+    "update": "UPDATE analysis_data SET content = ? WHERE topic = ? AND params_hash = ?",
+    "all": "SELECT id, topic, parameters, content FROM analysis_data",
+}
+
+# Hash the parameters string into the fixed-size lookup key
+def _params_hash(parameters):
+    """
+    Hash a parameters string into the 16-byte key used for lookups.
+    :param parameters: String containing user parameters (e.g., initial capital, risk tolerance)
+    :return: 16-byte BLAKE2b digest
+    """
+    return hashlib.blake2b(parameters.encode("utf-8"), digest_size=16).digest()
+
+# Compress content before storing it as a BLOB
+def _compress(content):
+    """
+    Compress report content for storage; markdown reports typically shrink 3-5x.
+    :param content: Analysis or advice content as a string
+    :return: zlib-compressed UTF-8 bytes
+    """
+    return sqlite3.Binary(zlib.compress(content.encode("utf-8"), 6))
+
+# Decompress content read back from the database
+def _decompress(content):
+    """
+    Decompress stored report content.
+    :param content: Stored content, either compressed bytes or legacy uncompressed text
+    :return: The content as a string
+    """
+    if isinstance(content, str):
+        return content
+    return zlib.decompress(content).decode("utf-8")
+
+# Rebuild a table created with the old AUTOINCREMENT primary key
+def _migrate_autoincrement(conn):
+    """
+    Rebuild 'analysis_data' without AUTOINCREMENT if it was created with it, keeping ids.
+    SQLite cannot drop AUTOINCREMENT in place, so the rows are copied into a new table.
+    :param conn: Open SQLite connection; the caller commits
+    """
+    sql = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'analysis_data'").fetchone()[0]
+    if "AUTOINCREMENT" not in sql.upper():
+        return
+    conn.execute("BEGIN")
+    conn.execute("ALTER TABLE analysis_data RENAME TO analysis_data_old")
+    conn.execute(_CREATE_TABLE)
+    conn.execute('''
+        INSERT INTO analysis_data (id, topic, parameters, params_hash, content)
+        SELECT id, topic, parameters, x'', content FROM analysis_data_old
+    ''')
+    conn.execute("DROP TABLE analysis_data_old")
+    conn.execute("DELETE FROM sqlite_sequence WHERE name IN ('analysis_data', 'analysis_data_old')")
+    logger.info("Rebuilt table 'analysis_data' without AUTOINCREMENT.")
+
+# Add and fill the params_hash column for tables created before it existed
+def _migrate_params_hash(conn):
+    """
+    Add the 'params_hash' column if it is missing and fill it for rows that lack a hash.
+    :param conn: Open SQLite connection; the caller commits
+    """
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(analysis_data)")]
+    if "params_hash" not in columns:
+        conn.execute("ALTER TABLE analysis_data ADD COLUMN params_hash BLOB NOT NULL DEFAULT x''")
+    rows = conn.execute("SELECT id, parameters FROM analysis_data WHERE params_hash = x''").fetchall()
+    if rows:
+        conn.executemany(
+            "UPDATE analysis_data SET params_hash = ? WHERE id = ?",
+            [(_params_hash(parameters), row_id) for row_id, parameters in rows]
+        )
+        logger.info("Hashed parameters for %s existing record(s) in 'analysis_data'.", len(rows))
+
+# Compress content rows written before content was stored as a compressed BLOB
+def _migrate_text_content(conn):
+    """
+    Rewrite rows whose content is still stored as plain TEXT into compressed BLOBs.
+    :param conn: Open SQLite connection; the caller commits
+    """
+    rows = conn.execute("SELECT id, content FROM analysis_data WHERE typeof(content) = 'text'").fetchall()
+    if rows:
+        conn.executemany(
+            "UPDATE analysis_data SET content = ? WHERE id = ?",
+            [(_compress(content), row_id) for row_id, content in rows]
+        )
+        logger.info("Compressed %s existing record(s) in 'analysis_data'.", len(rows))
+
+# Open a connection with the per-connection PRAGMAs applied
+def _connect():
+    """
+    Open a connection to the SQLite database with the per-connection PRAGMAs applied.
+    journal_mode=WAL is persisted in the database file by init_db(), but synchronous,
+    temp_store, mmap_size and cache_size must be set again on every new connection.
+    :return: An open sqlite3 connection
+    """
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA mmap_size=268435456")
+    conn.execute("PRAGMA cache_size=-64000")
+    return conn
+
+# Get the shared connection, opening it on first use
+def get_conn():
+    """
+    Return the module-wide SQLite connection, opening it on first use.
+    Keeping one connection alive across Streamlit reruns preserves SQLite's page cache,
+    schema cache and prepared-statement cache between button clicks.
+    :return: The shared sqlite3 connection
+    """
+    global _conn
+    with _lock:
+        if _conn is None:
+            _conn = _connect()
+        return _conn
 
 # Initialize or connect to an SQLite database and create the table if it doesn't exist
 def init_db():
@@ -10,22 +154,21 @@ def init_db():
     Initialize the SQLite database and create the 'analysis_data' table if it doesn't exist.
     """
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS analysis_data (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                topic TEXT NOT NULL,
-                parameters TEXT NOT NULL,
-                content TEXT NOT NULL
-            )
-        ''')
-        conn.commit()
-        print("Database initialized and table 'analysis_data' is ready.")
+        conn = get_conn()
+        with _lock:
+            conn.execute("PRAGMA journal_mode=WAL")
+            # The migrations commit together, or roll back together if any step fails
+            with conn:
+                conn.execute(_CREATE_TABLE)
+                _migrate_autoincrement(conn)
+                _migrate_params_hash(conn)
+                _migrate_text_content(conn)
+                # Retrieve, update and delete all filter on (topic, params_hash)
+                conn.execute("DROP INDEX IF EXISTS idx_topic_params")
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_topic_hash ON analysis_data (topic, params_hash)")
+        logger.info("Database initialized and table 'analysis_data' is ready.")
     except sqlite3.Error as e:
-        print(f"Error initializing database: {e}")
-    finally:
-        conn.close()
+        logger.error("Error initializing database: %s", e)
 
 # Check if the 'analysis_data' table exists
 def check_table_exists():
@@ -34,23 +177,40 @@ def check_table_exists():
     :return: True if the table exists, False otherwise.
     """
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT name FROM sqlite_master WHERE type='table' AND name='analysis_data';
-        ''')
-        result = cursor.fetchone()
+        conn = get_conn()
+        with _lock:
+            result = conn.execute('''
+                SELECT name FROM sqlite_master WHERE type='table' AND name='analysis_data';
+            ''').fetchone()
         if result:
-            print("Table 'analysis_data' exists.")
+            logger.debug("Table 'analysis_data' exists.")
             return True
         else:
-            print("Table 'analysis_data' does not exist.")
+            logger.debug("Table 'analysis_data' does not exist.")
             return False
     except sqlite3.Error as e:
-        print(f"Error checking table existence: {e}")
+        logger.error("Error checking table existence: %s", e)
         return False
-    finally:
-        conn.close()
+
+# Save several records to SQLite in a single transaction
+def save_many(rows):
+    """
+    Save several records to SQLite in one transaction, so the batch pays for a single commit.
+    :param rows: Iterable of (topic, parameters, content) tuples
+    """
+    try:
+        conn = get_conn()
+        with _lock, conn:
+            conn.executemany(
+                _STMTS["insert"],
+                (
+                    (topic, parameters, _params_hash(parameters), _compress(content))
+                    for topic, parameters, content in rows
+                )
+            )
+        logger.debug("Content saved to SQLite database.")
+    except sqlite3.Error as e:
+        logger.error("Error saving content to SQLite: %s", e)
 
 # Save data to SQLite
 def save_to_sqlite(topic, parameters, content):
@@ -60,19 +220,24 @@ def save_to_sqlite(topic, parameters, content):
     :param parameters: String containing user parameters (e.g., initial capital, risk tolerance)
     :param content: Analysis or advice content to save
     """
+    save_many([(topic, parameters, content)])
+
+# Look up data in SQLite without a fallback message
+def lookup_sqlite(topic, parameters):
+    """
+    Look up saved content from SQLite based on topic and parameters.
+    :param topic: Topic for the analysis (e.g., stock symbol or investment strategy)
+    :param parameters: String containing user parameters (e.g., initial capital, risk tolerance)
+    :return: The saved content, or None if not found or on error
+    """
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO analysis_data (topic, parameters, content)
-            VALUES (?, ?, ?)
-        ''', (topic, parameters, content))
-        conn.commit()
-        print("Content saved to SQLite database.")
+        conn = get_conn()
+        with _lock:
+            result = conn.execute(_STMTS["select"], (topic, _params_hash(parameters))).fetchone()
+        return _decompress(result[0]) if result else None
     except sqlite3.Error as e:
-        print(f"Error saving content to SQLite: {e}")
-    finally:
-        conn.close()
+        logger.error("Error looking up content in SQLite: %s", e)
+        return None
 
 # Retrieve data from SQLite
 def retrieve_from_sqlite(topic, parameters):
@@ -82,25 +247,12 @@ def retrieve_from_sqlite(topic, parameters):
     :param parameters: String containing user parameters (e.g., initial capital, risk tolerance)
     :return: The saved content or a message if not found
     """
-    try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT content FROM analysis_data
-            WHERE topic = ? AND parameters = ?
-        ''', (topic, parameters))
-        result = cursor.fetchone()
-        if result:
-            print("Content retrieved successfully.")
-            return result[0]  # Return the content
-        else:
-            print("No content found for the given topic and parameters.")
-            return "No content found for the given topic and parameters."
-    except sqlite3.Error as e:
-        print(f"Error retrieving content from SQLite: {e}")
-        return "An error occurred while retrieving the content."
-    finally:
-        conn.close()
+    content = lookup_sqlite(topic, parameters)
+    if content is not None:
+        logger.debug("Content retrieved successfully.")
+        return content
+    logger.debug("No content found for the given topic and parameters.")
+    return "No content found for the given topic and parameters."
 
 # Delete data from SQLite based on topic and parameters
 def delete_from_sqlite(topic, parameters):
@@ -111,24 +263,46 @@ def delete_from_sqlite(topic, parameters):
     :return: Message indicating whether deletion was successful or not.
     """
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute('''
-            DELETE FROM analysis_data
-            WHERE topic = ? AND parameters = ?
-        ''', (topic, parameters))
-        conn.commit()
+        conn = get_conn()
+        with _lock, conn:
+            cursor = conn.execute(_STMTS["delete"], (topic, _params_hash(parameters)))
         if cursor.rowcount > 0:
-            print("Content deleted successfully.")
+            logger.debug("Content deleted successfully.")
             return "Content deleted successfully."
         else:
-            print("No content found to delete for the given topic and parameters.")
+            logger.debug("No content found to delete for the given topic and parameters.")
             return "No content found to delete for the given topic and parameters."
     except sqlite3.Error as e:
-        print(f"Error deleting content from SQLite: {e}")
+        logger.error("Error deleting content from SQLite: %s", e)
         return "An error occurred while deleting the content."
-    finally:
-        conn.close()
+
+# Stream all data from the database in batches
+def iter_all_data(batch=256):
+    """
+    Iterate over all saved records in the 'analysis_data' table, fetching them in batches
+    so the full result set is never held in memory at once.
+    :param batch: Number of rows to fetch from SQLite per round trip
+    :return: Generator of (id, topic, parameters, content) tuples
+    """
+    try:
+        conn = get_conn()
+        with _lock:
+            cursor = conn.execute(_STMTS["all"])
+        # Close the cursor even if the caller stops early, so the read doesn't stay open on the
+        # shared connection and hold back WAL checkpoints
+        try:
+            while True:
+                with _lock:
+                    chunk = cursor.fetchmany(batch)
+                if not chunk:
+                    return
+                for row_id, topic, parameters, content in chunk:
+                    yield row_id, topic, parameters, _decompress(content)
+        finally:
+            with _lock:
+                cursor.close()
+    except sqlite3.Error as e:
+        logger.error("Error retrieving all records: %s", e)
 
 # Retrieve all data from the database
 def retrieve_all_data():
@@ -136,18 +310,9 @@ def retrieve_all_data():
     Retrieve all saved records from the 'analysis_data' table.
     :return: List of all records, or an empty list if no data is found
     """
-    try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute('SELECT * FROM analysis_data')
-        records = cursor.fetchall()
-        print("All records retrieved successfully.")
-        return records
-    except sqlite3.Error as e:
-        print(f"Error retrieving all records: {e}")
-        return []
-    finally:
-        conn.close()
+    records = list(iter_all_data())
+    logger.debug("All records retrieved successfully.")
+    return records
 
 # Update existing data in SQLite based on topic and parameters
 def update_sqlite(topic, parameters, new_content):
@@ -159,22 +324,15 @@ def update_sqlite(topic, parameters, new_content):
     :return: Message indicating whether update was successful or not.
     """
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute('''
-            UPDATE analysis_data
-            SET content = ?
-            WHERE topic = ? AND parameters = ?
-        ''', (new_content, topic, parameters))
-        conn.commit()
+        conn = get_conn()
+        with _lock, conn:
+            cursor = conn.execute(_STMTS["update"], (_compress(new_content), topic, _params_hash(parameters)))
         if cursor.rowcount > 0:
-            print("Content updated successfully.")
+            logger.debug("Content updated successfully.")
             return "Content updated successfully."
         else:
-            print("No matching content found to update.")
+            logger.debug("No matching content found to update.")
             return "No matching content found to update."
     except sqlite3.Error as e:
-        print(f"Error updating content in SQLite: {e}")
-        return "An error occurred while updating the content."
-    finally:
-        conn.close()
\ No newline at end of file
+        logger.error("Error updating content in SQLite: %s", e)
+        return "An error occurred while updating the content."
\ No newline at end of file
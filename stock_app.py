@@ -1,10 +1,15 @@
 import streamlit as st
 import os
 import yfinance as yf
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
+from concurrent.futures import ThreadPoolExecutor
 from crewai import Agent, Task, Crew, Process
 from dotenv import load_dotenv
-from sqlite_backend import init_db, save_to_sqlite, retrieve_from_sqlite, check_table_exists
+from _indicators import compute_indicators, lttb_indices
+from sqlite_backend import init_db, save_to_sqlite, retrieve_from_sqlite, lookup_sqlite, check_table_exists
 
 # Load environment variables
 load_dotenv()
@@ -13,19 +18,40 @@ load_dotenv()
 OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
 NEWSAPI_KEY = os.environ.get("NEWSAPI_KEY") # Make sure to add your NewsAPI key in the .env file
 
-# Ensure the SQLite database is initialized
-init_db()
-
-# Verify that the table exists
-if not check_table_exists():
-    st.error("Table 'analysis_data' could not be created. Please check your database setup.")
-else:
-    print("Table 'analysis_data' is confirmed to exist.")
+# Reuse one pooled HTTP session so NewsAPI requests keep the TLS connection open,
+# retrying transient failures with a short backoff. Retry-After is ignored because urllib3
+# doesn't cap that sleep, and a long one would hang the page
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=2,
+    pool_maxsize=4,
+    max_retries=Retry(
+        total=3,
+        backoff_factor=0.2,
+        status_forcelist=[429, 500, 502, 503, 504],
+        respect_retry_after_header=False
+    )
+))
 
 # Streamlit configuration
 st.set_page_config(page_title="Stock Market Analysis & Investment (India)", page_icon="💹")
 st.title("Stock Market Analysis & Investment (India)")
 
+# Initialize the SQLite database and verify the table once per process, not on every rerun.
+# A failure raises instead of returning, so it isn't cached and the next rerun retries
+@st.cache_resource(show_spinner=False)
+def _bootstrap():
+    init_db()
+    if not check_table_exists():
+        raise RuntimeError("Table 'analysis_data' could not be created.")
+
+# Verify that the table exists
+try:
+    _bootstrap()
+    print("Table 'analysis_data' is confirmed to exist.")
+except RuntimeError:
+    st.error("Table 'analysis_data' could not be created. Please check your database setup.")
+
 # Initialize session state for storing analysis content
 if "analysis_content" not in st.session_state:
     st.session_state.analysis_content = ""
@@ -43,29 +69,29 @@ period = st.selectbox("Select Data Period", ["1mo", "3mo", "6mo", "1y", "5y", "1
 st.write(f"Initial Capital: ₹{initial_capital}")
 
 # Define a function to fetch stock data with technical indicators using yfinance
+@st.cache_data(ttl=900, show_spinner=False)
 def fetch_stock_data(symbol, period="1y"):
     stock = yf.Ticker(symbol)
     data = stock.history(period=period)
+    # yfinance returns an empty frame instead of raising; raise so the failure isn't cached
+    if data.empty:
+        raise ValueError(f"No price history returned for {symbol} ({period}).")
 
     # Technical Indicators
-    data['MA50'] = data['Close'].rolling(window=50).mean()
-    data['MA200'] = data['Close'].rolling(window=200).mean()
-    delta = data['Close'].diff(1)
-    gain = delta.where(delta > 0, 0)
-    loss = -delta.where(delta < 0, 0)
-    avg_gain = gain.rolling(window=14).mean()
-    avg_loss = loss.rolling(window=14).mean()
-    rs = avg_gain / avg_loss
-    data['RSI'] = 100 - (100 / (1 + rs))
-    data['Upper_BB'] = data['Close'].rolling(window=20).mean() + (data['Close'].rolling(window=20).std() * 2)
-    data['Lower_BB'] = data['Close'].rolling(window=20).mean() - (data['Close'].rolling(window=20).std() * 2)
+    ma50, ma200, rsi, upper_bb, lower_bb = compute_indicators(data['Close'].to_numpy(dtype='float64'))
+    data['MA50'] = ma50
+    data['MA200'] = ma200
+    data['RSI'] = rsi
+    data['Upper_BB'] = upper_bb
+    data['Lower_BB'] = lower_bb
 
     return data
 
 # Fetch fundamental data
+@st.cache_data(ttl=3600, show_spinner=False)
 def fetch_fundamental_data(symbol):
     stock = yf.Ticker(symbol)
-    info = stock.info
+    info = stock.get_info()
     return {
         "Market Cap": info.get("marketCap"),
         "P/E Ratio": info.get("trailingPE"),
@@ -74,38 +100,65 @@ def fetch_fundamental_data(symbol):
     }
 
 # Fetch real-time news using NewsAPI
+@st.cache_data(ttl=300, show_spinner=False)
 def fetch_realtime_news(stock_symbol):
     url = f"https://newsapi.ai/api/v1/news?apikey={NEWSAPI_KEY}&q={stock_symbol}&language=en"
+    # Errors are raised rather than returned as [], so st.cache_data doesn't cache the failure;
+    # _parallel_fetch falls back to an empty list outside the cache
+    response = _SESSION.get(url, timeout=5)
+    if response.status_code != 200:
+        raise RuntimeError(f"NewsAPI returned {response.status_code}: {response.text}")
+    news_data = orjson.loads(response.content)
+    news_articles = [
+        {"title": article["title"], "description": article["description"]}
+        for article in news_data["articles"][:5]  # Limit to the top 5 articles
+    ]
+    return news_articles
+
+# Downsample long histories before charting so fewer points are serialized to the browser
+def _downsample(series_or_frame, column=None, n_out=500):
+    if len(series_or_frame) <= 1000:
+        return series_or_frame
+    values = series_or_frame[column] if column is not None else series_or_frame
+    return series_or_frame.iloc[lttb_indices(values.to_numpy(dtype='float64'), n_out)]
+
+# Return a future's result, or a default if that fetch failed, so one failure doesn't hide the others
+def _result_or_default(future, default, label):
     try:
-        response = requests.get(url)
-        if response.status_code == 200:
-            news_data = response.json()
-            news_articles = [
-                {"title": article["title"], "description": article["description"]}
-                for article in news_data["articles"][:5]  # Limit to the top 5 articles
-            ]
-            return news_articles
-        else:
-            print("Error fetching news:", response.status_code, response.text)
-            return []
+        return future.result()
     except Exception as e:
-        print("Error fetching news:", e)
-        return []
+        print(f"Error fetching {label}:", e)
+        return default
+
+# Fetch stock data, fundamentals and news concurrently so the network waits overlap
+def _parallel_fetch(symbol, period):
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        stock_future = executor.submit(fetch_stock_data, symbol, period)
+        fundamentals_future = executor.submit(fetch_fundamental_data, symbol)
+        news_future = executor.submit(fetch_realtime_news, symbol)
+        return (
+            _result_or_default(stock_future, None, "stock data"),
+            _result_or_default(fundamentals_future, {}, "fundamental data"),
+            _result_or_default(news_future, [], "news"),
+        )
 
 # Display stock data with indicators
 if stock_symbol:
-    stock_data = fetch_stock_data(stock_symbol, period)
-    st.write(f"Stock Data with Indicators for {stock_symbol}")
-    st.line_chart(stock_data[['Close', 'MA50', 'MA200', 'Upper_BB', 'Lower_BB']])
-    st.line_chart(stock_data['RSI'])
+    stock_data, fundamentals, news_articles = _parallel_fetch(stock_symbol, period)
+    if stock_data is not None:
+        st.write(f"Stock Data with Indicators for {stock_symbol}")
+        st.line_chart(_downsample(stock_data[['Close', 'MA50', 'MA200', 'Upper_BB', 'Lower_BB']], 'Close'))
+        st.line_chart(_downsample(stock_data['RSI']))
+    else:
+        st.error(f"Could not fetch stock data for {stock_symbol}.")
+else:
+    fundamentals, news_articles = {}, []
 
 # Display fundamental data and economic indicators
-fundamentals = fetch_fundamental_data(stock_symbol) if stock_symbol else {}
 st.write("Fundamental Analysis")
 st.json(fundamentals)
 
 st.write("Real-Time News")
-news_articles = fetch_realtime_news(stock_symbol)
 for article in news_articles:
     st.write(f"{article['title']}\n{article['description']}")
 
@@ -146,38 +199,50 @@ advice_task = Task(
                 f"considering {risk_tolerance} risk, a {investment_horizon} horizon, and {portfolio_diversification}% diversification.",
     expected_output="Investment strategy with risk management techniques and capital allocation tips, incorporating recent news updates.",
     agent=investment_advisor,
-    async_execution=False,
-    output_file='investment-advice.md'
+    async_execution=False
 )
 
 # Button to Generate Analysis and Investment Advice
 if st.button("Generate Analysis & Advice"):
     if stock_symbol and initial_capital > 0:
-        crew = Crew(
-            agents=[stock_analyst, investment_advisor],
-            tasks=[analysis_task, advice_task],
-            process=Process.sequential,
-            memory=True,
-            cache=True,
-            max_rpm=100,
-            share_crew=True
+        # Key the cache on every input the agents see, so a hit is an exact repeat request
+        cache_parameters = (
+            f"₹{initial_capital}-{risk_tolerance}-{trading_strategy}-"
+            f"{investment_horizon}-{portfolio_diversification}-{period}"
         )
+        cached_content = lookup_sqlite(stock_symbol, cache_parameters)
+        if cached_content is not None:
+            st.info("Showing a previously generated analysis for these inputs.")
+            st.session_state.analysis_content = cached_content
+            st.markdown(st.session_state.analysis_content)
+        else:
+            crew = Crew(
+                agents=[stock_analyst, investment_advisor],
+                tasks=[analysis_task, advice_task],
+                process=Process.sequential,
+                memory=True,
+                cache=True,
+                max_rpm=100,
+                share_crew=True
+            )
 
-        result = crew.kickoff(inputs={
-            'stock_symbol': stock_symbol,
-            'initial_capital': initial_capital,
-            'risk_tolerance': risk_tolerance,
-            'trading_strategy': trading_strategy,
-            'investment_horizon': investment_horizon,
-            'portfolio_diversification': portfolio_diversification
-        })
-
-        if os.path.exists("investment-advice.md"):
-            with open("investment-advice.md", "r") as file:
-                st.session_state.analysis_content = file.read()
+            result = crew.kickoff(inputs={
+                'stock_symbol': stock_symbol,
+                'initial_capital': initial_capital,
+                'risk_tolerance': risk_tolerance,
+                'trading_strategy': trading_strategy,
+                'investment_horizon': investment_horizon,
+                'portfolio_diversification': portfolio_diversification
+            })
+
+            # Take the advice task's output straight from the crew result instead of a file on disk
+            content = result.tasks_output[-1].raw if getattr(result, 'tasks_output', None) else str(result)
+            if content:
+                st.session_state.analysis_content = content
                 st.markdown(st.session_state.analysis_content)
-        else:
-            st.error("Failed to generate analysis and advice. Please try again.")
+                save_to_sqlite(stock_symbol, cache_parameters, st.session_state.analysis_content)
+            else:
+                st.error("Failed to generate analysis and advice. Please try again.")
     else:
         st.error("Please enter all required trading inputs.")
 